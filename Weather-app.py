@@ -6,23 +6,156 @@ A simple REST API for fetching weather data with async support and basic UI.
 """
 
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple
+from contextlib import asynccontextmanager
 import asyncio
-import random
-from datetime import datetime
+import functools
+import gzip
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+
+import httpx
+import msgspec
+import numpy as np
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Share one pooled HTTP client for outbound weather API calls.
+    
+    Endpoints reach it as request.app.state.http instead of opening a
+    client (and its connections) per request.
+    """
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+        timeout=5.0
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
 
 
 app = FastAPI(
     title="Weather API",
     description="A simple API for fetching weather information",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# Compress larger bodies such as /docs and /openapi.json; responses that are
+# already encoded (the precompressed page) pass through untouched
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
+# Optional artificial delay (seconds) for demoing async behaviour; off by default
+SIMULATED_LATENCY = float(os.environ.get("WEATHER_SIMULATE_LATENCY", "0"))
+
+# Generated readings are reused per city for a short window
+CACHE_TTL = 30.0
+CACHE_MAXSIZE = 10_000
+
+# Normalized city -> (monotonic time stored, JSON-encoded weather data). Every
+# entry shares the same TTL, so insertion order is also expiry order.
+_weather_cache: Dict[str, Tuple[float, bytes]] = {}
+
+# Normalized city -> refresh currently producing its data
+_inflight: Dict[str, "asyncio.Future[bytes]"] = {}
+
+
+@functools.lru_cache(maxsize=100_000)
+def _normalize_city(city: str) -> str:
+    """Return the canonical form of a city name, memoized for repeat lookups."""
+    return city.strip().title()
+
+
+# A word in the city name starting with a compass direction nudges its base
+# temperature, e.g. "North Bay" or "Southampton"
+_DIRECTION_DELTAS = {"north": -10.0, "south": 10.0, "east": 2.0, "west": -2.0}
+_DIRECTION_PREFIXES = tuple(_DIRECTION_DELTAS)
+
+
+def _direction_delta(normalized_city: str) -> float:
+    """Return the temperature offset for the first compass word in a city name."""
+    for word in normalized_city.lower().replace("-", " ").split():
+        if word.startswith(_DIRECTION_PREFIXES):
+            # "north"/"south" are five letters long, "east"/"west" four
+            return _DIRECTION_DELTAS[word[:5] if word[0] in "ns" else word[:4]]
+    return 0.0
+
+
+_WEATHER_DESCRIPTIONS: Tuple[str, ...] = (
+    "Sunny", "Partly Cloudy", "Cloudy", "Rainy", "Thunderstorm",
+    "Snowy", "Foggy", "Windy", "Clear", "Overcast"
 )
 
+# Random readings are generated in vectorized batches, one row per reading:
+# (temperature offset, description index, humidity, pressure, wind speed)
+_RNG_BATCH_SIZE = 1024
+_rng = np.random.default_rng()
+_weather_draws: List[Tuple[float, int, int, int, float]] = []
+
 
-class WeatherData(BaseModel):
+def _generate_weather_draws(size: int) -> List[Tuple[float, int, int, int, float]]:
+    """Scale a block of uniform draws to reading ranges in a single numpy pass."""
+    draws = _rng.random((size, 5))
+    temperature_offset = draws[:, 0] * 10 - 5
+    description_index = (draws[:, 1] * len(_WEATHER_DESCRIPTIONS)).astype(np.int64)
+    humidity = 30 + (draws[:, 2] * 61).astype(np.int64)
+    pressure = 980 + (draws[:, 3] * 61).astype(np.int64)
+    wind_speed = np.round(draws[:, 4] * 20, 1)
+    return list(zip(
+        temperature_offset.tolist(),
+        description_index.tolist(),
+        humidity.tolist(),
+        pressure.tolist(),
+        wind_speed.tolist(),
+    ))
+
+
+def _next_weather_draw() -> Tuple[float, int, int, int, float]:
+    """Pop one pre-scaled reading, refilling the batch when it runs out."""
+    if not _weather_draws:
+        _weather_draws.extend(_generate_weather_draws(_RNG_BATCH_SIZE))
+    return _weather_draws.pop()
+
+
+def _reseed_after_fork() -> None:
+    """Give a forked worker its own random stream instead of the parent's copy."""
+    global _rng
+    _rng = np.random.default_rng()
+    _weather_draws.clear()
+
+
+# Each worker process owns its generator, so draws never contend on a shared
+# lock; servers that fork after importing the app (e.g. gunicorn --preload)
+# would otherwise hand every worker the same stream
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed_after_fork)
+
+
+# Whole epoch second -> its ISO 8601 string; a racing refresh only yields a
+# string that is at most one second stale
+_timestamp_cache: List[Any] = [0, ""]
+
+
+def _current_timestamp() -> str:
+    """Return the current UTC time as ISO 8601, formatted at most once a second."""
+    now = int(time.time())
+    cached = _timestamp_cache
+    if cached[0] != now:
+        cached[1] = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        cached[0] = now
+    return cached[1]
+
+
+class WeatherData(msgspec.Struct, frozen=True):
     """Model for weather data response."""
     city: str
     temperature: float
@@ -33,63 +166,116 @@ class WeatherData(BaseModel):
     timestamp: str
 
 
+_weather_encoder = msgspec.json.Encoder()
+
+# FastAPI cannot derive a schema from a msgspec Struct, so the route documents
+# the one msgspec generates
+_, _schema_components = msgspec.json.schema_components([WeatherData])
+_WEATHER_DATA_SCHEMA = _schema_components["WeatherData"]
+
+
 class WeatherService:
     """Service class for handling weather data operations."""
     
     @staticmethod
-    async def fetch_weather_data(city: str) -> Dict[str, Any]:
+    async def fetch_weather_data(city: str) -> bytes:
         """
-        Fetch or simulate weather data for a given city.
+        Fetch weather data for a given city, from cache when still fresh.
+        
+        Concurrent misses for the same city share a single refresh rather
+        than each producing their own.
         
         Args:
             city: Name of the city to get weather for
             
         Returns:
-            Dictionary containing weather data
+            Weather data encoded as a JSON object
             
         Raises:
             HTTPException: If city is not found or API error occurs
         """
         # Normalize city name
-        normalized_city = city.strip().title()
+        normalized_city = _normalize_city(city)
         
-        # Simulate API delay
-        await asyncio.sleep(0.1)
+        hit = _weather_cache.get(normalized_city)
+        if hit is not None and time.monotonic() - hit[0] < CACHE_TTL:
+            return hit[1]
+        
+        refresh = _inflight.get(normalized_city)
+        if refresh is None:
+            refresh = asyncio.ensure_future(
+                WeatherService._refresh_weather_data(normalized_city)
+            )
+            _inflight[normalized_city] = refresh
+            refresh.add_done_callback(
+                lambda _: _inflight.pop(normalized_city, None)
+            )
+        # Shield so one cancelled client does not cancel the shared refresh
+        return await asyncio.shield(refresh)
+    
+    @staticmethod
+    async def _refresh_weather_data(normalized_city: str) -> bytes:
+        """Produce fresh encoded weather data for a city and cache it."""
+        # Stand-in for the upstream API round trip
+        if SIMULATED_LATENCY:
+            await asyncio.sleep(SIMULATED_LATENCY)
+        
+        data = WeatherService.encode_weather_data(
+            WeatherService.generate_weather_data(normalized_city)
+        )
         
-        # Generate realistic weather data based on city name
-        weather_descriptions = [
-            "Sunny", "Partly Cloudy", "Cloudy", "Rainy", "Thunderstorm",
-            "Snowy", "Foggy", "Windy", "Clear", "Overcast"
-        ]
+        # Re-insert so refreshed entries move to the back of the expiry order
+        _weather_cache.pop(normalized_city, None)
+        if len(_weather_cache) >= CACHE_MAXSIZE:
+            del _weather_cache[next(iter(_weather_cache))]
+        _weather_cache[normalized_city] = (time.monotonic(), data)
         
+        return data
+    
+    @staticmethod
+    def encode_weather_data(data: WeatherData) -> bytes:
+        """
+        Encode weather data as a JSON object.
+        
+        Args:
+            data: Reading as returned by generate_weather_data
+            
+        Returns:
+            JSON object bytes with the WeatherData fields as keys
+        """
+        return _weather_encoder.encode(data)
+    
+    @staticmethod
+    def generate_weather_data(normalized_city: str) -> WeatherData:
+        """
+        Simulate weather data for an already normalized city name.
+        
+        Args:
+            normalized_city: City name as returned by normalization
+            
+        Returns:
+            WeatherData for the city
+        """
         # Simple city-based temperature simulation
-        base_temp = 20.0  # Base temperature in Celsius
-        if "north" in normalized_city.lower() or "northern" in normalized_city.lower():
-            base_temp -= 10
-        elif "south" in normalized_city.lower() or "southern" in normalized_city.lower():
-            base_temp += 10
-        elif "east" in normalized_city.lower():
-            base_temp += 2
-        elif "west" in normalized_city.lower():
-            base_temp -= 2
+        base_temp = 20.0 + _direction_delta(normalized_city)  # Celsius
             
         # Add some randomness
-        temperature = round(base_temp + random.uniform(-5, 5), 1)
-        description = random.choice(weather_descriptions)
-        humidity = random.randint(30, 90)
-        pressure = random.randint(980, 1040)
-        wind_speed = round(random.uniform(0, 20), 1)
-        timestamp = datetime.now().isoformat()
+        temperature_offset, description_index, humidity, pressure, wind_speed = (
+            _next_weather_draw()
+        )
+        temperature = round(base_temp + temperature_offset, 1)
+        description = _WEATHER_DESCRIPTIONS[description_index]
+        timestamp = _current_timestamp()
         
-        return {
-            "city": normalized_city,
-            "temperature": temperature,
-            "description": description,
-            "humidity": humidity,
-            "pressure": pressure,
-            "wind_speed": wind_speed,
-            "timestamp": timestamp
-        }
+        return WeatherData(
+            city=normalized_city,
+            temperature=temperature,
+            description=description,
+            humidity=humidity,
+            pressure=pressure,
+            wind_speed=wind_speed,
+            timestamp=timestamp
+        )
 
 
 # HTML template for the UI
@@ -337,33 +523,112 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# The template is static, so encode, compress and build its headers once at import
+_HTML_BYTES = HTML_TEMPLATE.encode("utf-8")
+# mtime=0 keeps the bytes, and so the ETag, identical across workers and restarts
+_HTML_GZIP = gzip.compress(_HTML_BYTES, compresslevel=9, mtime=0)
+_HTML_ETAG = f'"{hashlib.md5(_HTML_BYTES).hexdigest()}"'
+_HTML_GZIP_ETAG = f'"{hashlib.md5(_HTML_GZIP).hexdigest()}"'
+# Uncompressed, the page is sent in 4 KiB chunks so the browser can start
+# parsing the head before the rest arrives
+_HTML_CHUNK_SIZE = 4096
+_HTML_CHUNKS = tuple(
+    _HTML_BYTES[i:i + _HTML_CHUNK_SIZE]
+    for i in range(0, len(_HTML_BYTES), _HTML_CHUNK_SIZE)
+)
+# GZipMiddleware adds "Vary: Accept-Encoding" to responses it leaves uncompressed
+_HTML_HEADERS = {
+    "cache-control": "public, max-age=3600",
+    "etag": _HTML_ETAG,
+}
+_HTML_GZIP_HEADERS = {
+    "content-length": str(len(_HTML_GZIP)),
+    "content-encoding": "gzip",
+    "cache-control": "public, max-age=3600",
+    "etag": _HTML_GZIP_ETAG,
+    "vary": "Accept-Encoding",
+}
+
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
+async def _iter_html_chunks() -> AsyncIterator[bytes]:
+    """Yield the uncompressed page chunk by chunk, without a threadpool hop."""
+    for chunk in _HTML_CHUNKS:
+        yield chunk
+
+
+async def root(request: Request) -> Response:
     """
     Serve the main HTML page with weather UI.
     
+    Registered as a plain Starlette route so the constant page skips
+    FastAPI's dependency and response-model handling.
+    
+    Args:
+        request: Incoming request, checked for If-None-Match and Accept-Encoding
+        
     Returns:
-        HTML content for the weather application
+        HTML content for the weather application, or 304 if unchanged
     """
-    return HTML_TEMPLATE
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        if request.headers.get("if-none-match") == _HTML_GZIP_ETAG:
+            return Response(status_code=304, headers={"etag": _HTML_GZIP_ETAG})
+        return Response(
+            content=_HTML_GZIP,
+            media_type="text/html; charset=utf-8",
+            headers=_HTML_GZIP_HEADERS
+        )
+    
+    if request.headers.get("if-none-match") == _HTML_ETAG:
+        return Response(status_code=304, headers={"etag": _HTML_ETAG})
+    return StreamingResponse(
+        _iter_html_chunks(),
+        media_type="text/html; charset=utf-8",
+        headers=_HTML_HEADERS
+    )
+
+
+app.router.add_route("/", root, methods=["GET"], include_in_schema=False)
+
+
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+    """
+    Turn any unhandled error into a JSON 500 the UI can display.
+    
+    Args:
+        request: Request that raised the error
+        exc: The unhandled exception
+        
+    Returns:
+        JSON response with the error in its detail field
+    """
+    return JSONResponse(
+        status_code=500,
+        content={"detail": f"Error fetching weather data: {exc}"}
+    )
 
 
 @app.get(
     "/weather/{city}",
-    response_model=WeatherData,
+    responses={
+        200: {"content": {"application/json": {"schema": _WEATHER_DATA_SCHEMA}}}
+    },
     summary="Get weather data for a city",
     description="Retrieve current weather information for a specified city"
 )
-async def get_weather(city: str) -> WeatherData:
+async def get_weather(city: str) -> Response:
     """
     Get weather data for a specific city.
     
+    The data comes from our own generator and is cached already encoded, so
+    it is returned as a raw response instead of being re-validated against
+    WeatherData.
+    
     Args:
         city: Name of the city to get weather for
         
     Returns:
-        WeatherData object containing weather information
+        JSON response containing weather information
         
     Raises:
         HTTPException: If city parameter is invalid
@@ -374,17 +639,20 @@ async def get_weather(city: str) -> WeatherData:
             detail="City name cannot be empty"
         )
     
-    try:
-        weather_service = WeatherService()
-        weather_data = await weather_service.fetch_weather_data(city)
-        return WeatherData(**weather_data)
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error fetching weather data: {str(e)}"
-        )
+    weather_data = await WeatherService.fetch_weather_data(city)
+    return Response(content=weather_data, media_type="application/json")
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Multiple workers need an import string rather than the app object
+    module_name = os.path.splitext(os.path.basename(__file__))[0]
+    uvicorn.run(
+        f"{module_name}:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=os.cpu_count() or 1,
+        access_log=False
+    )